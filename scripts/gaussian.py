@@ -1,22 +1,124 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
-#     "matplotlib",
 #     "numpy",
+#     "orjson",
 #     "plotext",
-#     "pyqt5",
-#     "pyside2",
 #     "requests",
 #     "scipy",
 # ]
 # ///
 
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+import orjson
 import requests
-import json
-from scipy import stats
+from scipy import special, stats
 import plotext as plt
 import numpy as np
 
+BASES_URL = "https://data.nicenumbers.net/bases"
+BASES_PARAMS = [("order", "id.asc")]
+CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "nice"
+
+def load_bases(ttl=3600):
+    """Fetch base data from the API, reusing a local copy if it's newer than ttl seconds"""
+    key = hashlib.sha256(f"{BASES_URL}?{BASES_PARAMS}".encode()).hexdigest()[:16]
+    path = CACHE_DIR / f"bases-{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime < ttl:
+            return orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        pass
+
+    response = requests.get(BASES_URL, params=BASES_PARAMS)
+    response.raise_for_status()
+    bases = orjson.loads(response.content)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(response.content)
+        tmp_path.replace(path)
+    except OSError:
+        pass
+    return bases
+
+
+def fit_stats(niceness, density, counts, mean, std):
+    """
+    Fit a Gaussian with the given mean and stdev against a niceness distribution.
+    Returns the normalized expected density, R², the chi-squared statistic,
+    degrees of freedom, and the number of bins used for the chi-squared test.
+    """
+    # Calculate expected Gaussian density values in log space so the tails don't underflow
+    log_expected = stats.norm.logpdf(niceness, loc=mean, scale=std)
+
+    # Normalize so both curves have same total area for comparison
+    log_expected_normalized = log_expected + np.log(np.sum(density)) - special.logsumexp(log_expected)
+    expected_density_normalized = np.exp(log_expected_normalized)
+
+    # Calculate R² (coefficient of determination)
+    # The residuals are shared with the chi-squared test below
+    diff = density - expected_density_normalized
+    ss_res = np.einsum("i,i->", diff, diff)
+    centered = density - density.mean()
+    ss_tot = np.einsum("i,i->", centered, centered)
+    r_squared = 1 - (ss_res / ss_tot)
+
+    # Chi-squared goodness-of-fit test
+    # Filter out bins with very low expected counts (< 5) for valid chi-squared test
+    total_count = counts.sum()
+    expected = expected_density_normalized * total_count
+    mask = expected >= 5
+    bins_used = int(np.count_nonzero(mask))
+    diff_filtered = diff[mask] * total_count
+    chi2_stat = np.einsum("i,i->", diff_filtered, diff_filtered / expected[mask])
+    # Degrees of freedom = number of bins - 1 - number of parameters estimated (we used existing mean/std, so -1)
+    dof = bins_used - 1
+
+    return expected_density_normalized, r_squared, chi2_stat, dof, bins_used
+
+
+def fit_all_bases(bases):
+    """
+    Compute the Gaussian fit R² for every base with a distribution at once.
+    Distributions are padded into a (bases, bins) matrix so each step is a single vectorized call.
+    Returns the base ids and their R² values.
+    """
+    bases = [b for b in bases if b["distribution"] and b["niceness_stdev"]]
+    num_bins = max(len(b["distribution"]) for b in bases)
+    niceness = np.full((len(bases), num_bins), np.nan)
+    density = np.zeros((len(bases), num_bins))
+    for i, b in enumerate(bases):
+        k = len(b["distribution"])
+        niceness[i, :k] = [d["niceness"] for d in b["distribution"]]
+        density[i, :k] = [d["density"] for d in b["distribution"]]
+    valid = ~np.isnan(niceness)
+    means = np.array([b["niceness_mean"] for b in bases])
+    stds = np.array([b["niceness_stdev"] for b in bases])
+
+    # Expected Gaussian density per base, normalized to the same area as the actual distribution
+    log_expected = np.where(valid, stats.norm.logpdf(niceness, loc=means[:, None], scale=stds[:, None]), -np.inf)
+    log_expected_normalized = (
+        log_expected
+        + np.log(density.sum(axis=1))[:, None]
+        - special.logsumexp(log_expected, axis=1)[:, None]
+    )
+    expected_density_normalized = np.exp(log_expected_normalized)
+
+    # R² per base, padding bins contribute nothing to either sum
+    diff = np.where(valid, density - expected_density_normalized, 0.0)
+    ss_res = np.einsum("bk,bk->b", diff, diff)
+    density_mean = density.sum(axis=1) / valid.sum(axis=1)
+    centered = np.where(valid, density - density_mean[:, None], 0.0)
+    ss_tot = np.einsum("bk,bk->b", centered, centered)
+    r_squared = 1 - (ss_res / ss_tot)
+
+    return np.array([b["id"] for b in bases]), r_squared
+
 
 # Get all base data, includes:
 # - id (base)
@@ -38,16 +140,21 @@ import numpy as np
 #   - num_uniques
 #   - base
 #   - niceness (0-1)
-bases = requests.get("https://data.nicenumbers.net/bases", params=[("order","id.asc")]).json()
+bases = load_bases()
 
 # Pick the base that has the highest amount searched
-base = sorted(bases, key=lambda x: x["checked_detailed"], reverse=True)[0]
+base = max(bases, key=lambda x: x["checked_detailed"])
 base_num = base["id"]
 distribution = base["distribution"]
 
+# Extract the distribution into arrays without intermediate lists
+n = len(distribution)
+niceness_values = np.fromiter((d["niceness"] for d in distribution), dtype=np.float64, count=n)
+density_values = np.fromiter((d["density"] for d in distribution), dtype=np.float64, count=n)
+counts = np.fromiter((d["count"] for d in distribution), dtype=np.int64, count=n)
+num_uniques = np.fromiter((d["num_uniques"] for d in distribution), dtype=np.int64, count=n)
+
 # Plot distribution (niceness vs density)
-xvals = [d["niceness"] for d in distribution]
-yvals = [d["density"] for d in distribution]
 markers = [
     base["niceness_mean"] - 9*base["niceness_stdev"],
     base["niceness_mean"] - 6*base["niceness_stdev"],
@@ -56,7 +163,7 @@ markers = [
     base["niceness_mean"] + 3*base["niceness_stdev"],
     base["niceness_mean"] + 6*base["niceness_stdev"],
 ]
-plt.plot(xvals, yvals)
+plt.plot(niceness_values.tolist(), density_values.tolist())
 [plt.vline(m) for m in markers]
 plt.theme("clear")
 plt.plotsize(120, 20)
@@ -69,42 +176,14 @@ plt.clear_figure()
 print()
 
 print("Gaussian curve fitting:")
-# Fit a Gaussian curve using the mean and stdev from the data
-niceness_values = np.array([d['niceness'] for d in distribution])
-density_values = np.array([d['density'] for d in distribution])
-
-# Calculate expected Gaussian density values
-def gaussian(x, mean, std):
-    return (1 / (std * np.sqrt(2 * np.pi))) * np.exp(-0.5 * ((x - mean) / std) ** 2)
-
-expected_density = gaussian(niceness_values, base["niceness_mean"], base["niceness_stdev"])
-
-# Normalize so both curves have same total area for comparison
-expected_density_normalized = expected_density * (np.sum(density_values) / np.sum(expected_density))
-
-# Calculate R² (coefficient of determination)
-ss_res = np.sum((density_values - expected_density_normalized) ** 2)
-ss_tot = np.sum((density_values - np.mean(density_values)) ** 2)
-r_squared = 1 - (ss_res / ss_tot)
+expected_density_normalized, r_squared, chi2_stat, dof, bins_used = fit_stats(
+    niceness_values, density_values, counts, base["niceness_mean"], base["niceness_stdev"]
+)
 print(f"  R² (coefficient of determination): {r_squared:.6f}")
-
-# Chi-squared goodness-of-fit test
-# Need to ensure expected values are not too small
-observed = density_values * np.sum([d['count'] for d in distribution])
-expected = expected_density_normalized * np.sum([d['count'] for d in distribution])
-
-# Filter out bins with very low expected counts (< 5) for valid chi-squared test
-mask = expected >= 5
-observed_filtered = observed[mask]
-expected_filtered = expected[mask]
-
-if len(observed_filtered) > 0:
-    chi2_stat = np.sum((observed_filtered - expected_filtered) ** 2 / expected_filtered)
-    # Degrees of freedom = number of bins - 1 - number of parameters estimated (we used existing mean/std, so -1)
-    dof = len(observed_filtered) - 1
-    p_value = 1 - stats.chi2.cdf(chi2_stat, dof)
+if bins_used > 0:
+    p_value = stats.chi2.sf(chi2_stat, dof)
     print(f"  Chi-squared test: χ²={chi2_stat:.4f}, dof={dof}, p-value={p_value:.4f}")
-    print(f"    (bins used: {len(observed_filtered)}/{len(observed)}, {len(observed)-len(observed_filtered)} filtered for low expected counts)")
+    print(f"    (bins used: {bins_used}/{len(counts)}, {len(counts)-bins_used} filtered for low expected counts)")
 else:
     print(f"  Chi-squared test: Not enough bins with sufficient expected counts")
 
@@ -121,30 +200,32 @@ plt.clear_figure()
 print()
 
 print("For a Gaussian distribution:")
-# Calculate the z-score for a perfectly nice number
-z_score = (1.0 - base["niceness_mean"]) / base["niceness_stdev"]
-prob_greater = stats.norm.sf(z_score)
-print(f"Probability of a number being 100% nice (Z={z_score:.4f}): {prob_greater:.4e}")
-nums_searched = base["checked_niceonly"]
-expected_found = nums_searched * prob_greater
-nice_nums_found = [d for d in distribution if d["num_uniques"] == base_num][0]["count"]
-print(f"  Numbers searched: {nums_searched:.2e}, Expected found: {expected_found:.2f}, Actual nice numbers found: {nice_nums_found}")
-
-# Calculate the z-score for an off-by-one
-off_by_one_niceness = (base_num - 1) / base_num
-z_score = (off_by_one_niceness - base["niceness_mean"]) / base["niceness_stdev"]
-prob_greater = stats.norm.sf(z_score) - prob_greater
-print(f"Probability of an off-by-one ({100*off_by_one_niceness:.1f}% nice) (Z={z_score:.4f}): {prob_greater:.4e}")
-nums_searched = base["checked_detailed"]
-expected_found = nums_searched * prob_greater
-off_by_ones_found = [d for d in distribution if d["num_uniques"] == base_num - 1][0]["count"]
-print(f"  Numbers searched: {nums_searched:.2e}, Expected found: {expected_found:.2f}, Actual off-by-ones found: {off_by_ones_found}")
-
-# Calculate the z-score for an off-by-two
-off_by_two_niceness = (base_num - 2) / base_num
-z_score = (off_by_two_niceness - base["niceness_mean"]) / base["niceness_stdev"]
-prob_greater = stats.norm.sf(z_score) - prob_greater
-print(f"Probability of an off-by-two ({100*off_by_two_niceness:.1f}% nice) (Z={z_score:.4f}): {prob_greater:.4e}")
-expected_found = nums_searched * prob_greater
-off_by_twos_found = [d for d in distribution if d["num_uniques"] == base_num - 2][0]["count"]
-print(f"  Numbers searched: {nums_searched:.2e}, Expected found: {expected_found:.2f}, Actual off-by-twos found: {off_by_twos_found}\n")
+# Calculate the z-scores for perfectly nice numbers, off-by-ones, and off-by-twos
+targets = np.array([1.0, (base_num - 1) / base_num, (base_num - 2) / base_num])
+z_scores = (targets - base["niceness_mean"]) / base["niceness_stdev"]
+prob_sf = stats.norm.sf(z_scores)
+# Each probability only covers its own niceness bucket
+probs = np.diff(prob_sf, prepend=0.0)
+# Nice-only search covers perfectly nice numbers, everything else needs detailed search
+checked = [base["checked_niceonly"], base["checked_detailed"], base["checked_detailed"]]
+labels = ["nice numbers", "off-by-ones", "off-by-twos"]
+
+for k, (target, z_score, prob, nums_searched, label) in enumerate(zip(targets, z_scores, probs, checked, labels)):
+    if k == 0:
+        description = "a number being 100% nice"
+    else:
+        description = f"an {label[:-1]} ({100*target:.1f}% nice)"
+    expected_found = nums_searched * prob
+    actual_found = int(counts[num_uniques == base_num - k][0])
+    sys.stdout.write(
+        f"Probability of {description} (Z={z_score:.4f}): {prob:.4e}\n"
+        f"  Numbers searched: {nums_searched:.2e}, Expected found: {expected_found:.2f}, Actual {label} found: {actual_found}\n"
+    )
+sys.stdout.write("\n")
+
+sys.stdout.write("Gaussian curve fitting for all bases:\n")
+sys.stdout.write("".join(
+    f"  Base {base_id}: R²={r_squared:.6f}\n" for base_id, r_squared in zip(*fit_all_bases(bases))
+))
+sys.stdout.write("\n")
+sys.stdout.flush()